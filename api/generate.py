@@ -307,16 +307,17 @@ def calculate_fairness_metrics(schedule_data: List[Dict], engineers: List[str])
                 counts[engineer] = 0
         
         values = list(counts.values())
+        total = sum(values)
         min_count = min(values)
         max_count = max(values)
-        mean_count = sum(values) / len(values)
+        mean_count = total / len(values)
         
         # Calculate Gini coefficient
         n = len(values)
-        if n > 1 and sum(values) > 0:
+        if n > 1 and total > 0:
             sorted_values = sorted(values)
             cumsum = sum((i + 1) * val for i, val in enumerate(sorted_values))
-            gini = (2 * cumsum) / (n * sum(values)) - (n + 1) / n
+            gini = (2 * cumsum) / (n * total) - (n + 1) / n
         else:
             gini = 0
         
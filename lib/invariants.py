@@ -2,236 +2,308 @@
 Schedule invariants that must always hold
 """
 from datetime import date, timedelta
-from typing import List, Dict, Set, Tuple
+from typing import List, Dict, Set, Tuple, FrozenSet, Optional
 from collections import defaultdict, Counter
+from functools import lru_cache
+from itertools import chain
+
+# Per-engineer column keys, built once instead of formatting them per row
+_ENGINEER_KEYS = tuple(f'{i+1}) Engineer' for i in range(6))
+_STATUS_KEYS = tuple(f'Status {i+1}' for i in range(6))
+
+_ROLES = ('OnCall', 'Contacts', 'Appointments', 'Early1', 'Early2')
+_WEEKDAYS = frozenset(('Mon', 'Tue', 'Wed', 'Thu', 'Fri'))
+_WEEKEND = frozenset(('Sat', 'Sun'))
+
+# Schedules are re-verified with the same ISO date strings; a year of days fits comfortably
+_parse_date = lru_cache(maxsize=1024)(date.fromisoformat)
 
 class ScheduleInvariantError(Exception):
     """Raised when a schedule violates an invariant"""
     pass
 
-def verify_schedule_invariants(schedule_data: List[Dict], engineers: List[str], 
-                             start_sunday: date, weeks: int, leave_map: Dict[str, Set[date]]) -> List[str]:
+def verify_schedule_invariants(schedule_data: List[Dict], engineers: List[str],
+                             start_sunday: date, weeks: int, leave_map: Dict[str, Set[date]],
+                             leave_by_date: Optional[Dict[date, FrozenSet[str]]] = None) -> List[str]:
     """
     Verify all schedule invariants and return list of violations
+
+    leave_by_date may be passed when the caller already holds invert_leave_map(leave_map),
+    e.g. when verifying several schedules against the same leave.
     """
     violations = []
-    
-    # Group schedule by week and date
-    schedule_by_date = {row['Date']: row for row in schedule_data}
-    schedule_by_week = defaultdict(list)
-    
-    for row in schedule_data:
-        week_idx = row['WeekIndex']
-        schedule_by_week[week_idx].append(row)
-    
+
+    if leave_by_date is None:
+        leave_by_date = invert_leave_map(leave_map)
+
+    # Walk the schedule once and let each invariant check the summaries
+    summary = _summarize_schedule(schedule_data)
+
     # Invariant 1: Exactly one on-call per week
-    violations.extend(_verify_oncall_invariants(schedule_by_week, weeks))
-    
+    violations.extend(_verify_oncall_invariants(summary, weeks))
+
     # Invariant 2: On-call never scheduled on weekend during their week
-    violations.extend(_verify_oncall_weekend_exclusion(schedule_data, start_sunday))
-    
+    violations.extend(_verify_oncall_weekend_exclusion(summary))
+
     # Invariant 3: No engineer double-booked per day
-    violations.extend(_verify_no_double_booking(schedule_data, engineers))
-    
+    violations.extend(_verify_no_double_booking(summary))
+
     # Invariant 4: Leave excludes all assignments
-    violations.extend(_verify_leave_exclusions(schedule_data, leave_map))
-    
+    violations.extend(_verify_leave_exclusions(summary, leave_by_date))
+
     # Invariant 5: Weekly rotations are fair (within 1 assignment difference)
-    violations.extend(_verify_rotation_fairness(schedule_data, engineers, weeks))
-    
+    violations.extend(_verify_rotation_fairness(summary, engineers))
+
     # Invariant 6: Date continuity and correctness
-    violations.extend(_verify_date_continuity(schedule_data, start_sunday, weeks))
-    
+    violations.extend(_verify_date_continuity(summary, start_sunday, weeks))
+
     return violations
 
-def _verify_oncall_invariants(schedule_by_week: Dict[int, List[Dict]], weeks: int) -> List[str]:
+def invert_leave_map(leave_map: Dict[str, Set[date]]) -> Dict[date, FrozenSet[str]]:
+    """Re-key an engineer -> leave dates map by date, as the leave check looks it up per row"""
+    leave_by_date = defaultdict(set)
+    for engineer, leave_dates in leave_map.items():
+        for leave_date in leave_dates:
+            leave_by_date[leave_date].add(engineer)
+
+    return {leave_date: frozenset(names) for leave_date, names in leave_by_date.items()}
+
+def _summarize_schedule(schedule_data: List[Dict]) -> Dict:
+    """Collect everything the invariant checks need in a single pass over the rows"""
+    weeks_present = set()
+    weekday_oncall = {}
+    week_oncall = {}
+    weekend_workers = []
+    assignments = []
+    parsed_dates = []
+
+    # Weekday roles are counted per (role, engineer) pair and split per role afterwards
+    pair_counts = Counter()
+    weekend_counts = Counter()
+
+    for row in schedule_data:
+        date_str = row['Date']
+        week_idx = row['WeekIndex']
+        day = row['Day']
+        row_date = _parse_date(date_str)
+        weeks_present.add(week_idx)
+        parsed_dates.append(row_date)
+
+        roles = [(role, row.get(role, '')) for role in _ROLES]
+        tickets = _parse_tickets(row.get('Tickets'))
+        is_weekday = day in _WEEKDAYS
+        assignments.append((date_str, row_date, is_weekday, roles, tickets))
+
+        if is_weekday:
+            oncall_engineers = weekday_oncall.setdefault(week_idx, set())
+            if row['OnCall']:
+                oncall_engineers.add(row['OnCall'])
+                week_oncall[week_idx] = row['OnCall']
+
+            pair_counts.update(pair for pair in roles if pair[1])
+
+        elif day in _WEEKEND:
+            working = []
+            for eng_key, status_key in zip(_ENGINEER_KEYS, _STATUS_KEYS):
+                engineer = row.get(eng_key, '')
+                status = row.get(status_key, '')
+                if engineer and status == 'WORK':
+                    working.append(engineer)
+            weekend_counts.update(working)
+            weekend_workers.append((week_idx, date_str, working))
+
+    role_counts = {role: Counter() for role in _ROLES}
+    for (role, engineer), count in pair_counts.items():
+        role_counts[role][engineer] = count
+    role_counts['Weekend'] = weekend_counts
+
+    return {
+        'weeks_present': weeks_present,
+        'weekday_oncall': weekday_oncall,
+        'week_oncall': week_oncall,
+        'weekend_workers': weekend_workers,
+        'assignments': assignments,
+        'role_counts': role_counts,
+        'parsed_dates': parsed_dates
+    }
+
+def _parse_tickets(tickets: str) -> Tuple[str, ...]:
+    """Split a 'A, B' tickets cell into stripped, non-empty engineer names"""
+    if not tickets:
+        return ()
+    return tuple(name for name in (part.strip() for part in tickets.split(', ')) if name)
+
+def _verify_oncall_invariants(summary: Dict, weeks: int) -> List[str]:
     """Verify exactly one on-call per week"""
     violations = []
-    
+
     for week_idx in range(weeks):
-        if week_idx not in schedule_by_week:
+        if week_idx not in summary['weeks_present']:
             violations.append(f"Missing week {week_idx} in schedule")
             continue
-            
-        week_schedule = schedule_by_week[week_idx]
-        weekday_schedule = [row for row in week_schedule if row['Day'] in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']]
-        
-        if not weekday_schedule:
+
+        if week_idx not in summary['weekday_oncall']:
             continue  # No weekdays in this week (shouldn't happen)
-            
+
         # Get all on-call assignments for this week
-        oncall_engineers = set()
-        for row in weekday_schedule:
-            if row['OnCall']:
-                oncall_engineers.add(row['OnCall'])
-        
+        oncall_engineers = summary['weekday_oncall'][week_idx]
+
         if len(oncall_engineers) == 0:
             violations.append(f"Week {week_idx}: No on-call engineer assigned")
         elif len(oncall_engineers) > 1:
             violations.append(f"Week {week_idx}: Multiple on-call engineers: {oncall_engineers}")
-    
+
     return violations
 
-def _verify_oncall_weekend_exclusion(schedule_data: List[Dict], start_sunday: date) -> List[str]:
+def _verify_oncall_weekend_exclusion(summary: Dict) -> List[str]:
     """Verify on-call engineers don't work weekends during their week"""
     violations = []
-    
-    # Group by week and find on-call engineers
-    week_oncall = {}
-    for row in schedule_data:
-        week_idx = row['WeekIndex']
-        if row['OnCall'] and row['Day'] in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']:
-            week_oncall[week_idx] = row['OnCall']
-    
+    week_oncall = summary['week_oncall']
+
     # Check weekend assignments
-    for row in schedule_data:
-        if row['Day'] in ['Sat', 'Sun']:
-            week_idx = row['WeekIndex']
-            oncall_engineer = week_oncall.get(week_idx)
-            
-            if oncall_engineer:
-                # Check if on-call engineer is working this weekend
-                for i, engineer in enumerate([row.get(f'{j+1}) Engineer', '') for j in range(6)]):
-                    status = row.get(f'Status {i+1}', '')
-                    if engineer == oncall_engineer and status == 'WORK':
-                        violations.append(f"Week {week_idx}: On-call engineer {oncall_engineer} working weekend on {row['Date']}")
-    
+    for week_idx, date_str, working in summary['weekend_workers']:
+        oncall_engineer = week_oncall.get(week_idx)
+
+        if oncall_engineer:
+            # Check if on-call engineer is working this weekend
+            for engineer in working:
+                if engineer == oncall_engineer:
+                    violations.append(f"Week {week_idx}: On-call engineer {oncall_engineer} working weekend on {date_str}")
+
     return violations
 
-def _verify_no_double_booking(schedule_data: List[Dict], engineers: List[str]) -> List[str]:
+def _verify_no_double_booking(summary: Dict) -> List[str]:
     """Verify no engineer is assigned to multiple roles on the same day"""
     violations = []
-    
-    for row in schedule_data:
-        if row['Day'] not in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']:
+
+    for date_str, _, is_weekday, roles, tickets in summary['assignments']:
+        if not is_weekday:
             continue  # Skip weekends
-            
-        # Count role assignments per engineer
-        engineer_roles = defaultdict(list)
-        
-        roles = ['OnCall', 'Contacts', 'Appointments', 'Early1', 'Early2']
-        for role in roles:
-            engineer = row.get(role, '')
-            if engineer:
-                engineer_roles[engineer].append(role)
-        
-        # Check tickets assignment
-        tickets_engineers = row.get('Tickets', '').split(', ') if row.get('Tickets') else []
-        for engineer in tickets_engineers:
-            if engineer.strip():
-                engineer_roles[engineer.strip()].append('Tickets')
-        
-        # Find double bookings
-        for engineer, assigned_roles in engineer_roles.items():
-            if len(assigned_roles) > 1:
-                violations.append(f"{row['Date']}: Engineer {engineer} assigned to multiple roles: {assigned_roles}")
-    
+
+        # Remember each engineer's first role; only build role lists on a collision
+        first_role = {}
+        conflicts = None
+
+        for role, engineer in chain(roles, (('Tickets', engineer) for engineer in tickets)):
+            if not engineer:
+                continue
+            if engineer in first_role:
+                if conflicts is None:
+                    conflicts = {}
+                conflicts.setdefault(engineer, [first_role[engineer]]).append(role)
+            else:
+                first_role[engineer] = role
+
+        # Report double bookings in order of first assignment
+        if conflicts:
+            for engineer in first_role:
+                if engineer in conflicts:
+                    violations.append(f"{date_str}: Engineer {engineer} assigned to multiple roles: {conflicts[engineer]}")
+
     return violations
 
-def _verify_leave_exclusions(schedule_data: List[Dict], leave_map: Dict[str, Set[date]]) -> List[str]:
+def _verify_leave_exclusions(summary: Dict, leave_by_date: Dict[date, FrozenSet[str]]) -> List[str]:
     """Verify engineers on leave are not assigned to any roles"""
     violations = []
-    
-    for row in schedule_data:
-        row_date = date.fromisoformat(row['Date'])
-        
+
+    if not leave_by_date:
+        return violations
+
+    for date_str, row_date, _, roles, tickets in summary['assignments']:
         # Find engineers on leave this day
-        engineers_on_leave = set()
-        for engineer, leave_dates in leave_map.items():
-            if row_date in leave_dates:
-                engineers_on_leave.add(engineer)
-        
+        engineers_on_leave = leave_by_date.get(row_date)
+
         if not engineers_on_leave:
             continue
-            
+
         # Check role assignments
-        roles = ['OnCall', 'Contacts', 'Appointments', 'Early1', 'Early2']
-        for role in roles:
-            engineer = row.get(role, '')
+        for role, engineer in roles:
             if engineer in engineers_on_leave:
-                violations.append(f"{row['Date']}: Engineer {engineer} on leave but assigned to {role}")
-        
+                violations.append(f"{date_str}: Engineer {engineer} on leave but assigned to {role}")
+
         # Check tickets assignment
-        tickets_engineers = row.get('Tickets', '').split(', ') if row.get('Tickets') else []
-        for engineer in tickets_engineers:
-            if engineer.strip() in engineers_on_leave:
-                violations.append(f"{row['Date']}: Engineer {engineer} on leave but assigned to Tickets")
-    
+        for engineer in tickets:
+            if engineer in engineers_on_leave:
+                violations.append(f"{date_str}: Engineer {engineer} on leave but assigned to Tickets")
+
     return violations
 
-def _verify_rotation_fairness(schedule_data: List[Dict], engineers: List[str], weeks: int) -> List[str]:
+def _verify_rotation_fairness(summary: Dict, engineers: List[str]) -> List[str]:
     """Verify rotations are fair (max-min delta <= 1 per role)"""
     violations = []
-    
-    # Count assignments per engineer per role
-    role_counts = {
-        'OnCall': Counter(),
-        'Contacts': Counter(),
-        'Appointments': Counter(),
-        'Early1': Counter(),
-        'Early2': Counter(),
-        'Weekend': Counter()
-    }
-    
-    for row in schedule_data:
-        # Count weekday roles
-        if row['Day'] in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']:
-            for role in ['OnCall', 'Contacts', 'Appointments', 'Early1', 'Early2']:
-                engineer = row.get(role, '')
-                if engineer:
-                    role_counts[role][engineer] += 1
-        
-        # Count weekend work
-        elif row['Day'] in ['Sat', 'Sun']:
-            for i in range(6):
-                engineer = row.get(f'{i+1}) Engineer', '')
-                status = row.get(f'Status {i+1}', '')
-                if engineer and status == 'WORK':
-                    role_counts['Weekend'][engineer] += 1
-    
+
     # Check fairness for each role
-    for role, counts in role_counts.items():
-        if not counts:
+    for role, counts in summary['role_counts'].items():
+        if not counts or not engineers:
             continue
-            
-        min_count = min(counts.values()) if counts else 0
-        max_count = max(counts.values()) if counts else 0
-        
-        # For engineers not assigned to this role, count is 0
-        for engineer in engineers:
-            if engineer not in counts:
-                min_count = 0
-        
+
+        # Engineers never assigned to this role count as 0
+        values = [counts.get(engineer, 0) for engineer in engineers]
+        min_count = min(values)
+        max_count = max(values)
+
         if max_count - min_count > 1:
             violations.append(f"Role {role}: Unfair distribution (min={min_count}, max={max_count})")
-    
+
     return violations
 
-def _verify_date_continuity(schedule_data: List[Dict], start_sunday: date, weeks: int) -> List[str]:
+def _verify_date_continuity(summary: Dict, start_sunday: date, weeks: int) -> List[str]:
     """Verify dates are continuous and correct"""
     violations = []
-    
-    expected_dates = []
-    for i in range(weeks * 7):
-        expected_dates.append(start_sunday + timedelta(days=i))
-    
-    actual_dates = [date.fromisoformat(row['Date']) for row in schedule_data]
-    
-    if len(actual_dates) != len(expected_dates):
-        violations.append(f"Expected {len(expected_dates)} days, got {len(actual_dates)}")
+
+    expected_days = weeks * 7
+    actual_dates = summary['parsed_dates']
+
+    if len(actual_dates) != expected_days:
+        violations.append(f"Expected {expected_days} days, got {len(actual_dates)}")
         return violations
-    
-    for i, (expected, actual) in enumerate(zip(expected_dates, actual_dates)):
-        if expected != actual:
+
+    # Day i must sit exactly i days after the start; only build the expected date on a mismatch
+    start_ordinal = start_sunday.toordinal()
+    for i, actual in enumerate(actual_dates):
+        if actual.toordinal() - start_ordinal != i:
+            expected = start_sunday + timedelta(days=i)
             violations.append(f"Date mismatch at position {i}: expected {expected}, got {actual}")
-    
+
     return violations
 
-def assert_schedule_invariants(schedule_data: List[Dict], engineers: List[str], 
-                             start_sunday: date, weeks: int, leave_map: Dict[str, Set[date]]):
-    """Assert all invariants hold, raise exception if any violations"""
-    violations = verify_schedule_invariants(schedule_data, engineers, start_sunday, weeks, leave_map)
-    
+def _first_failing_invariant(schedule_data: List[Dict], engineers: List[str], start_sunday: date,
+                             weeks: int, leave_by_date: Dict[date, FrozenSet[str]]) -> List[str]:
+    """Run invariants cheapest and most fundamental first, returning the first non-empty result"""
+    summary = _summarize_schedule(schedule_data)
+
+    checks = (
+        lambda: _verify_date_continuity(summary, start_sunday, weeks),
+        lambda: _verify_oncall_invariants(summary, weeks),
+        lambda: _verify_no_double_booking(summary),
+        lambda: _verify_leave_exclusions(summary, leave_by_date),
+        lambda: _verify_oncall_weekend_exclusion(summary),
+        lambda: _verify_rotation_fairness(summary, engineers),
+    )
+
+    for check in checks:
+        violations = check()
+        if violations:
+            return violations
+
+    return []
+
+def assert_schedule_invariants(schedule_data: List[Dict], engineers: List[str],
+                             start_sunday: date, weeks: int, leave_map: Dict[str, Set[date]],
+                             leave_by_date: Optional[Dict[date, FrozenSet[str]]] = None,
+                             fail_fast: bool = False):
+    """Assert all invariants hold, raise exception if any violations
+
+    With fail_fast, stop at the first failing invariant and report only its violations.
+    """
+    if fail_fast:
+        if leave_by_date is None:
+            leave_by_date = invert_leave_map(leave_map)
+        violations = _first_failing_invariant(schedule_data, engineers, start_sunday, weeks, leave_by_date)
+    else:
+        violations = verify_schedule_invariants(schedule_data, engineers, start_sunday, weeks, leave_map,
+                                                leave_by_date)
+
     if violations:
         violation_text = '\n'.join(f"- {v}" for v in violations)
-        raise ScheduleInvariantError(f"Schedule invariant violations:\n{violation_text}")
\ No newline at end of file
+        raise ScheduleInvariantError(f"Schedule invariant violations:\n{violation_text}")
@@ -0,0 +1,170 @@
+"""
+Tests for schedule invariant verification
+"""
+import unittest
+from datetime import date
+import sys
+import os
+
+# Add the parent directory to the path to import from lib
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api.generate import make_schedule_simple
+from lib.invariants import (
+    verify_schedule_invariants,
+    assert_schedule_invariants,
+    invert_leave_map,
+    ScheduleInvariantError
+)
+
+class TestScheduleInvariants(unittest.TestCase):
+
+    def setUp(self):
+        self.engineers = ['Alice', 'Bob', 'Carol', 'Dan', 'Eve', 'Frank']
+        self.start_sunday = date(2025, 8, 17)  # A Sunday
+        self.weeks = 2
+        self.seeds = {'weekend': 0, 'oncall': 0, 'contacts': 0, 'appointments': 0, 'early': 0}
+
+    def _make_schedule(self, leave_data=None):
+        result = make_schedule_simple(
+            start_sunday=self.start_sunday,
+            weeks=self.weeks,
+            engineers=self.engineers,
+            seeds=self.seeds,
+            leave_data=leave_data or []
+        )
+        return result['schedule']
+
+    def _verify(self, schedule_data, leave_map=None, weeks=None):
+        if leave_map is None:
+            leave_map = {engineer: set() for engineer in self.engineers}
+        return verify_schedule_invariants(
+            schedule_data, self.engineers, self.start_sunday,
+            weeks if weeks is not None else self.weeks, leave_map
+        )
+
+    def test_missing_week_reported(self):
+        """Test that a truncated schedule reports the missing week and day count"""
+        schedule_data = self._make_schedule()[:7]
+
+        violations = self._verify(schedule_data)
+
+        self.assertIn("Missing week 1 in schedule", violations)
+        self.assertIn("Expected 14 days, got 7", violations)
+
+    def test_multiple_oncall_in_week_reported(self):
+        """Test that two different on-call engineers in one week is a violation"""
+        schedule_data = self._make_schedule()
+        schedule_data[1]['OnCall'] = 'Zed'  # Monday of week 0
+
+        violations = self._verify(schedule_data)
+
+        self.assertTrue(any(v.startswith("Week 0: Multiple on-call engineers") for v in violations))
+
+    def test_leave_assignment_reported(self):
+        """Test that assigning an engineer on leave is reported for roles and tickets"""
+        schedule_data = self._make_schedule()
+        monday = schedule_data[1]
+        monday['Appointments'] = 'Alice'
+        monday['Tickets'] = 'Alice, Bob'
+        leave_map = {engineer: set() for engineer in self.engineers}
+        leave_map['Alice'] = {date.fromisoformat(monday['Date'])}
+
+        violations = self._verify(schedule_data, leave_map)
+
+        self.assertIn(f"{monday['Date']}: Engineer Alice on leave but assigned to Appointments", violations)
+        self.assertIn(f"{monday['Date']}: Engineer Alice on leave but assigned to Tickets", violations)
+
+    def test_precomputed_leave_index_matches(self):
+        """Test that passing invert_leave_map output gives the same violations"""
+        schedule_data = self._make_schedule()
+        monday = schedule_data[1]
+        monday['Contacts'] = 'Bob'
+        leave_map = {engineer: set() for engineer in self.engineers}
+        leave_map['Bob'] = {date.fromisoformat(monday['Date'])}
+        leave_map['Carol'] = {date.fromisoformat(monday['Date'])}
+
+        leave_by_date = invert_leave_map(leave_map)
+        self.assertEqual(leave_by_date, {date.fromisoformat(monday['Date']): frozenset({'Bob', 'Carol'})})
+
+        violations = verify_schedule_invariants(
+            schedule_data, self.engineers, self.start_sunday, self.weeks, leave_map,
+            leave_by_date=leave_by_date
+        )
+        self.assertEqual(violations, self._verify(schedule_data, leave_map))
+        self.assertIn(f"{monday['Date']}: Engineer Bob on leave but assigned to Contacts", violations)
+
+    def test_double_booking_reported(self):
+        """Test that an engineer holding two roles on a weekday is reported"""
+        schedule_data = self._make_schedule()
+        monday = schedule_data[1]
+        monday['Appointments'] = monday['Contacts']
+
+        violations = self._verify(schedule_data)
+
+        self.assertIn(
+            f"{monday['Date']}: Engineer {monday['Contacts']} assigned to multiple roles: ['Contacts', 'Appointments']",
+            violations
+        )
+
+    def test_fairness_measured_over_team_only(self):
+        """Test that assignments to names outside the team don't skew fairness bounds"""
+        schedule_data = self._make_schedule()
+        weekdays = [row for row in schedule_data if row['Day'] in ['Mon', 'Tue', 'Wed', 'Thu', 'Fri']]
+        for i, row in enumerate(weekdays):
+            row['Appointments'] = ['Alice', 'Bob'][i % 2]
+        weekdays[1]['Appointments'] = 'Zed'  # Not on the team: Alice 5, Bob 4, Zed 1
+
+        violations = verify_schedule_invariants(
+            schedule_data, ['Alice', 'Bob'], self.start_sunday, self.weeks, {}
+        )
+
+        self.assertFalse(any(v.startswith("Role Appointments") for v in violations))
+
+    def test_date_mismatch_reported(self):
+        """Test that an out-of-sequence date is reported by position"""
+        schedule_data = self._make_schedule()
+        schedule_data[3]['Date'] = schedule_data[2]['Date']
+
+        violations = self._verify(schedule_data)
+
+        self.assertIn("Date mismatch at position 3: expected 2025-08-20, got 2025-08-19", violations)
+
+    def test_assert_raises_with_all_violations(self):
+        """Test that assert_schedule_invariants raises with every violation listed"""
+        schedule_data = self._make_schedule()[:7]
+        leave_map = {engineer: set() for engineer in self.engineers}
+        expected = verify_schedule_invariants(schedule_data, self.engineers, self.start_sunday, self.weeks, leave_map)
+
+        with self.assertRaises(ScheduleInvariantError) as ctx:
+            assert_schedule_invariants(schedule_data, self.engineers, self.start_sunday, self.weeks, leave_map)
+
+        for violation in expected:
+            self.assertIn(f"- {violation}", str(ctx.exception))
+
+    def test_fail_fast_reports_first_failing_invariant(self):
+        """Test that fail_fast raises with only the date continuity violations"""
+        schedule_data = self._make_schedule()[:7]
+        leave_map = {engineer: set() for engineer in self.engineers}
+
+        with self.assertRaises(ScheduleInvariantError) as ctx:
+            assert_schedule_invariants(schedule_data, self.engineers, self.start_sunday, self.weeks,
+                                       leave_map, fail_fast=True)
+
+        message = str(ctx.exception)
+        self.assertIn("- Expected 14 days, got 7", message)
+        self.assertNotIn("Missing week", message)
+
+    def test_fail_fast_passes_clean_schedule(self):
+        """Test that fail_fast does not raise when every invariant holds"""
+        schedule_data = [
+            {'Date': f'2025-08-{17 + i}', 'Day': day, 'WeekIndex': 0, 'OnCall': 'Alice' if day not in ('Sat', 'Sun') else '',
+             'Contacts': '', 'Appointments': '', 'Early1': '', 'Early2': '', 'Tickets': ''}
+            for i, day in enumerate(['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat'])
+        ]
+
+        assert_schedule_invariants(schedule_data, ['Alice'], self.start_sunday, 1, {'Alice': set()},
+                                   fail_fast=True)
+
+if __name__ == '__main__':
+    unittest.main()